@@ -0,0 +1,306 @@
+"""
+Benchmarks reprodutíveis do pipeline com comparação contra uma baseline.
+
+Uso:
+    python benchmarks/run_benchmarks.py                      # roda e compara com benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --update-baseline    # grava a execução atual como baseline
+    python benchmarks/run_benchmarks.py --quick --tolerance 0.3 --filter rasterize
+"""
+import argparse
+import functools
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "test"))
+
+import numpy as np
+
+from polygon.cone import generate_cone
+from polygon.open_box import generate_open_box
+from polygon.truncked_cone import generate_truncked_cone
+from test import create_open_box, create_cone, create_frustum
+from test_2 import apply_transformations
+from test_3 import look_at, transform_to_camera
+from test_4 import perspective_projection as perspective_projection_4, projetar_xy
+from test_5 import perspective_projection as perspective_projection_5, rasterize_objects
+from fused_projection import WorldToScreen, as_vertices, get_perspective_matrix
+from utils.sparse_voxels import BrickMap
+
+RESOLUTIONS = [(320, 240), (640, 480), (1280, 720)]
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+
+def measure(func, repeats):
+    """ Retorna (menor tempo em s, pico de memória em bytes, último resultado). """
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+
+    # O pico de memória é medido numa execução separada, pois o tracemalloc deixa o código mais lento
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(times), peak, result
+
+
+# Entradas compartilhadas, criadas apenas quando algum caso selecionado precisa delas
+
+@functools.lru_cache(maxsize=None)
+def random_vertices(count):
+    # Vértices sintéticos com semente fixa para que as execuções sejam comparáveis
+    return np.random.default_rng(0).uniform(-5, 5, size=(count, 3))
+
+
+@functools.lru_cache(maxsize=None)
+def camera_view():
+    return look_at(np.array([10, 10, 10]), np.array([0, 0, 0]), np.array([0, 0, 1]))
+
+
+@functools.lru_cache(maxsize=None)
+def projected_cone(res):
+    vertices, faces = create_cone(resolution=res)
+    return perspective_projection_5(vertices, focal_length=5, plane="xy"), faces
+
+
+@functools.lru_cache(maxsize=None)
+def dense_open_box(n):
+    return generate_open_box(altura=n, largura=n, profundidade=n, espessura=2, padding=5)
+
+
+@functools.lru_cache(maxsize=None)
+def brick_map(n):
+    return BrickMap.from_dense(dense_open_box(n))
+
+
+def cases(quick):
+    """
+    Gera (nome, preparar). preparar() monta as entradas e retorna
+    (função medida, throughput(resultado) -> {unidade: quantidade}[, estatísticas(resultado)]).
+    """
+    grid_sizes = [10, 20] if quick else [10, 20, 40]
+    mesh_resolutions = [20, 50] if quick else [20, 50, 70]
+    vertex_counts = [10_000, 100_000] if quick else [10_000, 100_000, 1_000_000]
+
+    def voxels(matriz):
+        return {"voxels": matriz.size}
+
+    for n in grid_sizes:
+        yield f"generate_cone/n={n}", lambda n=n: (
+            lambda: generate_cone(altura=n, raio_base=n // 2, padding=5), voxels)
+        yield f"generate_truncked_cone/n={n}", lambda n=n: (
+            lambda: generate_truncked_cone(altura=n, raio_base_maior=n // 2, raio_base_menor=n // 4, padding=5),
+            voxels)
+        yield f"generate_open_box/n={n}", lambda n=n: (
+            lambda: generate_open_box(altura=n, largura=n, profundidade=n, espessura=max(1, n // 10), padding=5),
+            voxels)
+
+    for res in mesh_resolutions:
+        def triangles(mesh, res=res):
+            return {"triangles": len(mesh[1]), "voxels": res ** 3}
+
+        yield f"create_open_box/res={res}", lambda res=res, t=triangles: (lambda: create_open_box(resolution=res), t)
+        yield f"create_cone/res={res}", lambda res=res, t=triangles: (lambda: create_cone(resolution=res), t)
+        yield f"create_frustum/res={res}", lambda res=res, t=triangles: (lambda: create_frustum(resolution=res), t)
+
+    for count in vertex_counts:
+        def per_vertex(result, count=count):
+            return {"vertices": count}
+
+        yield f"apply_transformations/v={count}", lambda count=count, t=per_vertex: (
+            lambda v=random_vertices(count): apply_transformations(v, scale=2, rotation=(10, 20, 30),
+                                                                   translation=(1, 2, 3)),
+            t)
+        yield f"transform_to_camera/v={count}", lambda count=count, t=per_vertex: (
+            lambda v=random_vertices(count), m=camera_view(): transform_to_camera(v, m), t)
+        yield f"projetar_xy/v={count}", lambda count=count, t=per_vertex: (
+            lambda v=random_vertices(count): projetar_xy(v), t)
+        yield f"test_4.perspective_projection/v={count}", lambda count=count, t=per_vertex: (
+            lambda v=random_vertices(count): perspective_projection_4(v, d=20), t)
+        yield f"test_5.perspective_projection/v={count}", lambda count=count, t=per_vertex: (
+            lambda v=random_vertices(count): perspective_projection_5(v, focal_length=20, plane="xy"), t)
+        yield f"WorldToScreen.project/v={count}", lambda count=count, t=per_vertex: _kernel_case(count, t)
+
+    def pixels(image):
+        return {"pixels": int((image == 0).sum())}
+
+    for res in mesh_resolutions[:2]:
+        for resolution in RESOLUTIONS:
+            yield f"rasterize_objects/res={res}/{resolution[0]}x{resolution[1]}", lambda res=res, r=resolution: (
+                lambda p=projected_cone(res): rasterize_objects(p[0], p[1], r), pixels)
+
+
+def _kernel_case(count, throughput):
+    # Kernel fundido com buffers de saída reaproveitados entre as chamadas
+    kernel = WorldToScreen(view=camera_view(), projection=get_perspective_matrix(d=20), capacity=count)
+    verts32 = as_vertices(random_vertices(count))
+    out_xy = np.empty((count, 2), dtype=np.float32)
+    out_depth = np.empty(count, dtype=np.float32)
+    return lambda: kernel.project(verts32, out_xy=out_xy, out_depth=out_depth), throughput
+
+
+def sparse_open_box(n, espessura=4, padding=8, tamanho_brick=8):
+    """ Caixa aberta de lado n construída direto no BrickMap, com as mesmas paredes de generate_open_box. """
+    lado = n - 2 * padding - 2 * espessura
+    mapa = BrickMap((n, n, n), tamanho_brick)
+    px, py, pz = padding, padding + espessura, padding + espessura
+    altura = n - 2 * padding
+
+    mapa.fill_region((px, py, pz - espessura), (px + altura, py + lado, pz))
+    mapa.fill_region((px, py, pz + lado), (px + altura, py + lado, pz + lado + espessura))
+    mapa.fill_region((px, py - espessura, pz - espessura), (px + altura, py, pz + lado + espessura))
+    mapa.fill_region((px, py + lado, pz - espessura), (px + altura, py + lado + espessura, pz + lado + espessura))
+    mapa.fill_region((px, py - espessura, pz - espessura), (px + espessura, py + lado + espessura, pz + lado + espessura))
+    return mapa
+
+
+def sparse_cases(quick):
+    # Memória do BrickMap comparada com a matriz densa float64 equivalente (que não é alocada)
+    def memory(mapa):
+        dense = int(np.prod(mapa.shape)) * 8
+        return {"sparse_bytes": mapa.nbytes(), "dense_bytes": dense, "ratio": mapa.nbytes() / dense}
+
+    def voxels(mapa):
+        return {"voxels": int(np.prod(mapa.shape))}
+
+    for n in ([128] if quick else [512, 1024]):
+        yield f"sparse_open_box/n={n}", lambda n=n: (lambda: sparse_open_box(n), voxels, memory)
+
+    n = 64 if quick else 128
+    yield f"BrickMap.from_dense/n={n}", lambda: (
+        lambda m=dense_open_box(n): BrickMap.from_dense(m), voxels, memory)
+
+    points = 1_000_000
+    yield f"BrickMap.contains/p={points}", lambda: (
+        lambda mapa=brick_map(n), p=np.random.default_rng(0).integers(0, dense_open_box(n).shape, size=(points, 3)):
+            mapa.contains(p),
+        lambda result: {"points": points})
+    yield f"BrickMap.to_dense/n={n}", lambda: (
+        lambda mapa=brick_map(n): mapa.to_dense(), lambda result: {"voxels": result.size})
+
+
+def run(quick, repeats, name_filter):
+    results = {}
+    for name, prepare in itertools.chain(cases(quick), sparse_cases(quick)):
+        if name_filter and name_filter not in name:
+            continue
+
+        # As entradas só são montadas para os casos selecionados
+        func, throughput, *stats = prepare()
+        elapsed, peak, result = measure(func, repeats)
+        rates = {f"{unit}/s": amount / elapsed for unit, amount in throughput(result).items()}
+        results[name] = {"time_s": elapsed, "peak_bytes": peak, "throughput": rates}
+        if stats:
+            results[name]["stats"] = stats[0](result)
+
+        rate_text = ", ".join(f"{value:,.0f} {unit}" for unit, value in rates.items())
+        print(f"{name:<48} {elapsed * 1000:>10.2f} ms {peak / 2 ** 20:>9.2f} MiB  {rate_text}")
+        if stats:
+            print(" " * 4 + ", ".join(f"{key}={value:,.4g}" for key, value in results[name]["stats"].items()))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "repeats": repeats,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+# Campos de meta que precisam coincidir para que a comparação faça sentido
+COMPARABLE_META = ("python", "numpy", "platform", "quick")
+
+
+def meta_mismatches(current, baseline):
+    return [
+        (key, baseline.get("meta", {}).get(key), current["meta"][key])
+        for key in COMPARABLE_META
+        if baseline.get("meta", {}).get(key) != current["meta"][key]
+    ]
+
+
+def compare(current, baseline, tolerance):
+    """ Compara tempo e memória com a baseline e retorna a lista de regressões. """
+    regressions = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+
+        for key in ("time_s", "peak_bytes"):
+            if reference[key] <= 0:
+                continue
+            ratio = result[key] / reference[key]
+            if ratio > 1 + tolerance:
+                regressions.append((name, key, ratio))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de geração, projeção e rasterização.")
+    parser.add_argument("--output", default=None, help="arquivo JSON com os resultados desta execução")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="arquivo JSON da baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora relativa aceita (0.2 = 20%%)")
+    parser.add_argument("--repeats", type=int, default=5, help="repetições por caso (usa o menor tempo)")
+    parser.add_argument("--quick", action="store_true", help="varredura reduzida")
+    parser.add_argument("--filter", default="", help="roda apenas casos cujo nome contém o texto")
+    parser.add_argument("--update-baseline", action="store_true", help="grava esta execução como baseline")
+    parser.add_argument("--force-compare", action="store_true",
+                        help="compara mesmo se python, numpy, plataforma ou --quick diferirem da baseline")
+    args = parser.parse_args()
+
+    current = run(args.quick, args.repeats, args.filter)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Nenhuma baseline em {args.baseline}; rode com --update-baseline para criá-la.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    mismatches = meta_mismatches(current, baseline)
+    if mismatches:
+        for key, expected, found in mismatches:
+            print(f"AVISO: {key} difere da baseline ({expected!r} != {found!r})")
+        if not args.force_compare:
+            print("Comparação ignorada; grave uma nova baseline neste ambiente ou use --force-compare.")
+            return 0
+
+    regressions = compare(current, baseline, args.tolerance)
+    for name, key, ratio in regressions:
+        print(f"REGRESSÃO {name} ({key}): {ratio:.2f}x a baseline")
+
+    if not regressions:
+        print(f"Nenhuma regressão acima de {args.tolerance:.0%} em relação à baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
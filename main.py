@@ -3,6 +3,9 @@ from polygon.line import plotar_solid, generate_line
 from polygon.open_box import generate_open_box
 from utils.plot_3d import plot_3d_matrix
 from polygon.truncked_cone import generate_truncked_cone
+from utils.voxel_volume import VoxelVolume
+from utils.voxelize import voxelize_mesh
+from utils import profiler
 
 if __name__ == "__main__":
 
@@ -57,4 +60,23 @@ if __name__ == "__main__":
 
     #Linha
     # vertices, arestas = generate_line(3)
-    # plotar_solid(vertices, arestas)
\ No newline at end of file
+    # plotar_solid(vertices, arestas)
+
+    # Edição incremental: recorta a tampa e re-extrai apenas os chunks alterados
+    # volume = VoxelVolume(caixa, tamanho_chunk=16)
+    # volume.mesh()
+    # volume.clear_region((15, 7, 7), (20, 27, 32))
+    # print("Chunks re-extraídos:", volume.update_mesh())
+    # vertices, faces = volume.mesh()
+
+    # Voxelização de uma malha transformada (ida e volta com o marching cubes)
+    # vertices, faces = volume.mesh()
+    # ocupacao = voxelize_mesh(vertices, faces, caixa.shape, origem=(0, 0, 0), espacamento=(1, 1, 1))
+
+    # Instrumentação do pipeline (desativada por padrão; RASTER3D_PROFILE=1 equivale a enable())
+    # profiler.enable()
+    # profiler.instrument_pipeline()
+    # ... gerar, extrair e rasterizar ...
+    # profiler.report()
+    # profiler.export_chrome_trace("trace.json")
+    # profiler.uninstrument()
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+class SharedMeshStore:
+    """
+    Guarda malhas e matrizes de voxels em memória compartilhada, acessíveis pelos processos de trabalho.
+
+    O total é limitado a max_bytes: ao inserir uma entrada, as menos usadas recentemente são
+    removidas, exceto as que estão fixadas (pin) por um render em andamento.
+    """
+
+    def __init__(self, max_bytes=1 << 30):
+        self.max_bytes = max_bytes
+        # chave -> {nome do array: SharedMemory}, na ordem do uso mais antigo para o mais recente
+        self._blocks = OrderedDict()
+        # chave -> {nome do array: (nome do bloco, shape, dtype)}
+        self._descriptors = {}
+        # chave -> número de renders usando a entrada
+        self._pins = {}
+
+    def __contains__(self, key):
+        return key in self._descriptors
+
+    def get(self, key):
+        descriptor = self._descriptors.get(key)
+        if descriptor is not None:
+            self._blocks.move_to_end(key)
+        return descriptor
+
+    def put(self, key, pin=False, **arrays):
+        """
+        Copia os arrays para blocos de memória compartilhada e retorna o descritor da entrada.
+        Com pin=True a entrada já é fixada, para não ser removida antes de ser usada.
+        """
+        blocks = {}
+        descriptor = {}
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            blocks[name] = block
+            descriptor[name] = (block.name, array.shape, array.dtype.str)
+
+        self.remove(key)
+        self._blocks[key] = blocks
+        self._descriptors[key] = descriptor
+        if pin:
+            self.pin(key)
+        self._evict()
+        return descriptor
+
+    def pin(self, key):
+        self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, key):
+        count = self._pins.get(key, 0) - 1
+        if count > 0:
+            self._pins[key] = count
+        else:
+            self._pins.pop(key, None)
+        self._evict()
+
+    def remove(self, key):
+        for block in self._blocks.pop(key, {}).values():
+            block.close()
+            block.unlink()
+        self._descriptors.pop(key, None)
+
+    def live_blocks(self):
+        """ Nomes de todos os blocos ainda válidos; os processos de trabalho liberam os demais. """
+        return {block_name for descriptor in self._descriptors.values() for block_name, _, _ in descriptor.values()}
+
+    def nbytes(self):
+        return sum(block.size for blocks in self._blocks.values() for block in blocks.values())
+
+    def _evict(self):
+        # Remove as entradas menos usadas recentemente até caber no limite
+        total = self.nbytes()
+        for key in list(self._blocks):
+            if total <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            total -= sum(block.size for block in self._blocks[key].values())
+            self.remove(key)
+
+    def close(self):
+        for key in list(self._blocks):
+            self.remove(key)
+
+
+# Blocos já abertos neste processo: nome do bloco -> (SharedMemory, array)
+_attached = {}
+
+
+def attach(descriptor, live_blocks=None):
+    """
+    Abre (uma única vez por processo) os arrays de um descritor sem copiá-los.
+    Se live_blocks for dado, antes fecha os blocos abertos que não estão mais na lista.
+    """
+    if live_blocks is not None:
+        release(set(_attached) - set(live_blocks))
+
+    arrays = {}
+    for name, (block_name, shape, dtype) in descriptor.items():
+        if block_name not in _attached:
+            block = shared_memory.SharedMemory(name=block_name)
+            # Quem cria o bloco é responsável por removê-lo; sem isso o resource_tracker
+            # do processo de trabalho apagaria o bloco ao encerrar
+            resource_tracker.unregister(block._name, "shared_memory")
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            array.flags.writeable = False
+            _attached[block_name] = (block, array)
+        arrays[name] = _attached[block_name][1]
+    return arrays
+
+
+def release(block_names):
+    # Fecha os mapeamentos deste processo para blocos removidos pelo daemon
+    for block_name in block_names:
+        block, array = _attached.pop(block_name, (None, None))
+        if block is None:
+            continue
+        del array
+        try:
+            block.close()
+        except BufferError:
+            # Ainda há arrays usando o bloco; o mapeamento é liberado quando eles forem coletados
+            pass
@@ -0,0 +1,281 @@
+"""
+Serviço local de renderização.
+
+O daemon mantém as malhas geradas em memória compartilhada (limitada por --max-mb, com
+remoção das menos usadas recentemente) e um conjunto de processos já aquecidos (numpy,
+skimage e matplotlib importados), de forma que renders repetidos dos mesmos objetos não
+pagam o custo de importação nem de geração.
+
+Uso:
+    python -m service.render_daemon --socket /tmp/raster3d.sock --workers 4
+
+Cada requisição é uma linha JSON, por exemplo:
+    {"shape": "cone", "params": {"radius": 1, "height": 3, "resolution": 50},
+     "transform": {"scale": 1, "rot": [45, 0, 0], "trans": [0, 0, 0]},
+     "camera": {"eye": [10, 10, 10], "target": [0, 0, 0], "up": [0, 0, 1]},
+     "projection": "perspective", "plane": "xy", "focal_length": 5,
+     "resolution": [640, 480], "output": "path"}
+
+A resposta é uma linha JSON. Com "output": "buffer", a linha traz "nbytes" e "shape"
+e é seguida pelos bytes da imagem (uint8).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from service.mesh_store import SharedMeshStore, attach
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SOCKET = "/tmp/raster3d.sock"
+
+MESH_SHAPES = ("open_box", "cone", "frustum", "line")
+VOXEL_SHAPES = ("voxel_open_box", "voxel_cone", "voxel_truncked_cone")
+
+
+def _init_worker():
+    # Importa tudo uma única vez por processo de trabalho
+    os.environ.setdefault("MPLBACKEND", "Agg")
+    for path in (ROOT, os.path.join(ROOT, "test")):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    import numpy  # noqa: F401
+    import skimage.measure  # noqa: F401
+    import matplotlib.pyplot  # noqa: F401
+    import test_4  # noqa: F401
+    import test_5  # noqa: F401
+
+
+def _ping():
+    return os.getpid()
+
+
+def generate_asset(shape, params):
+    """ Gera a malha (e a matriz de voxels, se for o caso) de um objeto. """
+    from skimage import measure
+
+    if shape in MESH_SHAPES:
+        import test
+        builder = getattr(test, "create_" + shape)
+        vertices, faces = builder(**params)
+        return {"verts": vertices, "faces": faces}
+
+    if shape in VOXEL_SHAPES:
+        from polygon.cone import generate_cone
+        from polygon.open_box import generate_open_box
+        from polygon.truncked_cone import generate_truncked_cone
+
+        generators = {
+            "voxel_open_box": generate_open_box,
+            "voxel_cone": generate_cone,
+            "voxel_truncked_cone": generate_truncked_cone,
+        }
+        grid = generators[shape](**params)
+        vertices, faces, _, _ = measure.marching_cubes(grid, 0.5)
+        return {"verts": vertices, "faces": faces, "grid": grid.astype("uint8")}
+
+    raise ValueError(f"Objeto desconhecido: {shape}")
+
+
+def render_job(descriptor, job, output_dir, live_blocks):
+    """ Executa um render a partir dos arrays em memória compartilhada. """
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from test_2 import apply_transformations
+    from test_3 import look_at, transform_to_camera
+    from test_4 import projetar_xy, projetar_yz, projetar_zx
+    from test_5 import perspective_projection, rasterize_objects
+
+    # Blocos removidos pelo daemon deixam de ser mapeados por este processo
+    arrays = attach(descriptor, live_blocks)
+    vertices, faces = arrays["verts"], arrays["faces"]
+
+    transform = job.get("transform", {})
+    vertices = apply_transformations(
+        vertices,
+        scale=transform.get("scale", 1),
+        rotation=tuple(transform.get("rot", (0, 0, 0))),
+        translation=tuple(transform.get("trans", (0, 0, 0)))
+    )
+
+    camera = job.get("camera")
+    if camera:
+        view = look_at(np.array(camera["eye"], dtype=float),
+                       np.array(camera["target"], dtype=float),
+                       np.array(camera["up"], dtype=float))
+        vertices = transform_to_camera(vertices, view)
+
+    projection = job.get("projection", "perspective")
+    if projection == "perspective":
+        verts_2d = perspective_projection(vertices, focal_length=job.get("focal_length", 5),
+                                          plane=job.get("plane", "xy"))
+    else:
+        orthographic = {"xy": projetar_xy, "yz": projetar_yz, "zx": projetar_zx}
+        if projection not in orthographic:
+            raise ValueError("Projeção inválida! Escolha entre 'perspective', 'xy', 'yz' ou 'zx'.")
+        verts_2d = orthographic[projection](vertices)
+
+    resolution = tuple(job.get("resolution", (640, 480)))
+    image = rasterize_objects(verts_2d, faces, resolution).astype(np.uint8)
+
+    if job.get("output", "path") == "buffer":
+        return {"shape": image.shape, "buffer": image.tobytes()}
+
+    name = hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+    path = os.path.join(output_dir, f"{name}.png")
+
+    # Jobs idênticos podem rodar ao mesmo tempo em processos diferentes: cada um grava num
+    # arquivo próprio e o troca de lugar atomicamente, para nunca expor um PNG pela metade
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        plt.imsave(temporary, image, cmap="gray", vmin=0, vmax=255, format="png")
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    return {"path": path}
+
+
+class RenderDaemon:
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, workers=None, output_dir=None, max_bytes=1 << 30):
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.output_dir = output_dir or os.path.join(ROOT, "renders")
+        self.store = SharedMeshStore(max_bytes)
+        self.pool = None
+        self._locks = {}
+
+    async def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        # Aquece todos os processos antes de aceitar conexões
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _ping) for _ in range(self.workers)))
+
+        return await asyncio.start_unix_server(self.handle, path=self.socket_path)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        self.store.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    result = await self.render(json.loads(line))
+                    response = {"ok": True, **result}
+                except Exception as error:
+                    response = {"ok": False, "error": str(error)}
+                response["elapsed"] = time.perf_counter() - start
+
+                buffer = response.pop("buffer", None)
+                if buffer is not None:
+                    response["nbytes"] = len(buffer)
+                writer.write(json.dumps(response).encode() + b"\n")
+                if buffer is not None:
+                    writer.write(buffer)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def mesh(self, shape, params):
+        """
+        Retorna (chave, descritor, em cache) da malha, gerando-a uma única vez mesmo com pedidos
+        simultâneos. A entrada volta fixada no store; quem chama deve liberá-la com unpin.
+        """
+        key = (shape, json.dumps(params, sort_keys=True))
+        if key in self.store:
+            self.store.pin(key)
+            return key, self.store.get(key), True
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                if key in self.store:
+                    self.store.pin(key)
+                    return key, self.store.get(key), True
+                loop = asyncio.get_running_loop()
+                arrays = await loop.run_in_executor(self.pool, generate_asset, shape, params)
+                return key, self.store.put(key, pin=True, **arrays), False
+        finally:
+            # O lock só existe enquanto a geração está em andamento
+            if self._locks.get(key) is lock and not lock.locked():
+                del self._locks[key]
+
+    async def render(self, job):
+        key, descriptor, cached = await self.mesh(job["shape"], job.get("params", {}))
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self.pool, render_job, descriptor, job, self.output_dir,
+                                                self.store.live_blocks())
+        finally:
+            self.store.unpin(key)
+        result["cached"] = cached
+        return result
+
+
+async def request(job, socket_path=DEFAULT_SOCKET):
+    """ Envia um job ao daemon e retorna a resposta; com output="buffer", a imagem vem em "image". """
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    try:
+        writer.write(json.dumps(job).encode() + b"\n")
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        if "nbytes" in response:
+            import numpy as np
+            data = await reader.readexactly(response.pop("nbytes"))
+            response["image"] = np.frombuffer(data, dtype=np.uint8).reshape(response.pop("shape"))
+        return response
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def render(job, socket_path=DEFAULT_SOCKET):
+    return asyncio.run(request(job, socket_path))
+
+
+async def serve(socket_path, workers, output_dir, max_bytes):
+    daemon = RenderDaemon(socket_path, workers, output_dir, max_bytes)
+    server = await daemon.start()
+    print(f"Servindo em {socket_path} com {daemon.workers} processos")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daemon local de renderização.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output-dir", default=None)
+    parser.add_argument("--max-mb", type=int, default=1024, help="limite da memória compartilhada (MiB)")
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.socket, args.workers, args.output_dir, args.max_mb << 20))
@@ -0,0 +1,161 @@
+import numpy as np
+import matplotlib.pyplot as plt
+from test_3 import look_at
+from test_3 import create_scene
+from test_5 import draw_faces
+
+# Eixos (horizontal, vertical, profundidade) de cada plano de projeção
+PLANE_AXES = {"xy": (0, 1, 2), "yz": (1, 2, 0), "zx": (2, 0, 1)}
+
+def get_perspective_matrix(d=4, plane="xy"):
+    """ Perspectiva equivalente a test_4/test_5.perspective_projection: divide por (profundidade + d). """
+    if plane not in PLANE_AXES:
+        raise ValueError("Plano de projeção inválido! Escolha entre 'xy', 'yz' ou 'zx'.")
+    u, v, depth = PLANE_AXES[plane]
+
+    matrix = np.zeros((4, 4))
+    matrix[0, u] = 1
+    matrix[1, v] = 1
+    matrix[2, depth] = 1
+    matrix[3, depth] = 1
+    matrix[3, 3] = d  # w = profundidade + d
+    return matrix
+
+def get_orthographic_matrix(plane="xy"):
+    """ Ortogonal equivalente a test_4.projetar_xy/yz/zx (w = 1). """
+    matrix = get_perspective_matrix(1, plane)
+    matrix[3, :3] = 0
+    return matrix
+
+def get_viewport_matrix(resolution, bounds):
+    """
+    Leva as coordenadas projetadas dentro de bounds = (xmin, ymin, xmax, ymax) para pixels,
+    com a mesma escala e inversão de Y de rasterize_objects.
+    Atua antes da divisão por w, por isso a translação é multiplicada por w.
+    """
+    xmin, ymin, xmax, ymax = bounds
+    scale = min(resolution[0] / (xmax - xmin), resolution[1] / (ymax - ymin))
+    return np.array([
+        [scale, 0, 0, -scale * xmin],
+        [0, -scale, 0, resolution[1] + scale * ymin],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1]
+    ])
+
+def as_vertices(vertices):
+    # Conversão única para o formato esperado por WorldToScreen.project
+    return np.ascontiguousarray(vertices, dtype=np.float32)
+
+class WorldToScreen:
+    """
+    Kernel fundido modelo -> câmera -> projeção -> viewport.
+
+    As quatro matrizes são combinadas numa única matriz 4x4; cada chamada faz uma
+    multiplicação e uma divisão por w, escrevendo as coordenadas de tela e a profundidade
+    (float32) em buffers fornecidos por quem chama. O buffer de trabalho só é realocado
+    quando o número de vértices cresce.
+    """
+
+    def __init__(self, model=None, view=None, projection=None, viewport=None, capacity=0):
+        self._work = np.empty((capacity, 4), dtype=np.float32)
+        self.set_matrices(model, view, projection, viewport)
+
+    def set_matrices(self, model=None, view=None, projection=None, viewport=None):
+        identity = np.eye(4)
+        matrix = (
+            (identity if viewport is None else viewport) @
+            (identity if projection is None else projection) @
+            (identity if view is None else view) @
+            (identity if model is None else model)
+        )
+        self.matrix = matrix
+        # Parte linear transposta (3x4) e translação (4,) prontas para a multiplicação
+        self._linear = np.ascontiguousarray(matrix[:, :3].T, dtype=np.float32)
+        self._offset = matrix[:, 3].astype(np.float32)
+
+    def _buffers(self, count, out_xy, out_depth):
+        if self._work.shape[0] < count:
+            self._work = np.empty((count, 4), dtype=np.float32)
+        if out_xy is None:
+            out_xy = np.empty((count, 2), dtype=np.float32)
+        if out_depth is None:
+            out_depth = np.empty(count, dtype=np.float32)
+        return self._work[:count], out_xy, out_depth
+
+    def project(self, vertices, out_xy=None, out_depth=None):
+        """
+        Projeta os vértices (N, 3); retorna (out_xy (N, 2), out_depth (N,)).
+        Os vértices devem ser float32 (converta uma vez com as_vertices): com float64 o matmul
+        criaria um temporário (N, 4) em toda chamada.
+        """
+        if vertices.dtype != np.float32:
+            raise TypeError("Os vértices devem ser float32; converta-os uma vez com as_vertices().")
+        work, out_xy, out_depth = self._buffers(len(vertices), out_xy, out_depth)
+
+        # Uma única multiplicação leva do mundo às coordenadas de recorte (x, y, z, w)
+        np.matmul(vertices, self._linear, out=work)
+        work += self._offset
+
+        # Divisão por w
+        np.divide(work[:, :2], work[:, 3:4], out=out_xy)
+        np.divide(work[:, 2], work[:, 3], out=out_depth)
+        return out_xy, out_depth
+
+    def project_fit(self, vertices, resolution, out_xy=None, out_depth=None):
+        """ Como project, mas ajusta a imagem aos vértices (sem viewport fixo), igual a rasterize_objects. """
+        out_xy, out_depth = self.project(vertices, out_xy, out_depth)
+
+        minimum = out_xy.min(axis=0)
+        extent = out_xy.max(axis=0) - minimum
+        scale = min(resolution[0] / extent[0], resolution[1] / extent[1])
+
+        # Normalização feita no próprio buffer de saída
+        out_xy -= minimum
+        out_xy *= scale
+        np.subtract(resolution[1], out_xy[:, 1], out=out_xy[:, 1])  # Inverte Y para coordenadas de imagem
+        return out_xy, out_depth
+
+def rasterize_screen(screen_xy, faces, resolution, image=None):
+    """ Rasteriza vértices já em coordenadas de tela, reaproveitando a imagem se fornecida. """
+    if image is None:
+        image = np.empty((resolution[1], resolution[0]))
+    image.fill(255)
+    draw_faces(screen_xy, faces, image)
+    return image
+
+if __name__ == "__main__":
+
+    # Vértices convertidos para float32 uma única vez, antes do laço de projeção
+    scene = [(as_vertices(verts), faces) for verts, faces in create_scene()]
+    resolution = (640, 480)
+
+    # Parâmetros da câmera
+    camera_eye = np.array([10, 10, 10])
+    camera_target = np.array([0, 0, 0])
+    camera_up = np.array([0, 0, 1])
+    view = look_at(camera_eye, camera_target, camera_up)
+
+    # Limites comuns a todos os objetos, calculados uma vez sem viewport
+    kernel = WorldToScreen(view=view, projection=get_perspective_matrix(d=20))
+    all_xy = np.concatenate([kernel.project(verts)[0] for verts, _ in scene])
+    bounds = (*all_xy.min(axis=0), *all_xy.max(axis=0))
+
+    # Buffers reaproveitados por todos os objetos
+    kernel.set_matrices(view=view, projection=get_perspective_matrix(d=20),
+                        viewport=get_viewport_matrix(resolution, bounds))
+    capacity = max(len(verts) for verts, _ in scene)
+    screen_xy = np.empty((capacity, 2), dtype=np.float32)
+    depth = np.empty(capacity, dtype=np.float32)
+
+    image = np.empty((resolution[1], resolution[0]))
+    image.fill(255)
+    for verts, faces in scene:
+        count = len(verts)
+        kernel.project(verts, out_xy=screen_xy[:count], out_depth=depth[:count])
+        draw_faces(screen_xy[:count], faces, image)
+
+    plt.figure(figsize=(8, 6))
+    plt.title(f"Cena - Kernel fundido ({resolution[0]}x{resolution[1]})")
+    plt.imshow(image, cmap="gray")
+    plt.axis("off")
+    plt.show()
@@ -0,0 +1,148 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from test import create_open_box, create_cone, create_frustum
+from test_2 import apply_transformations, get_transformation_matrix
+from test_3 import look_at
+
+BUILDERS = {
+    'open_box': create_open_box,
+    'cone': create_cone,
+    'frustum': create_frustum,
+}
+
+def focal_length_in_pixels(fov_degrees, image_height):
+    # Distância focal em pixels para um campo de visão vertical
+    return image_height / 2 / np.tan(np.radians(fov_degrees) / 2)
+
+class LODManager:
+    """
+    Mantém várias resoluções (níveis de detalhe) de cada primitiva e escolhe, por objeto e por quadro,
+    a menor resolução cujo erro projetado na tela fica dentro de pixel_error.
+    Níveis que ainda não existem são gerados em segundo plano; enquanto isso usa-se o nível pronto mais próximo.
+    """
+
+    def __init__(self, levels=(10, 20, 40, 70), pixel_error=1.0, max_workers=2):
+        self.levels = sorted(levels)
+        self.pixel_error = pixel_error
+        self._cache = {}      # (chave, resolução) -> (vértices, faces)
+        self._spheres = {}    # chave -> (centro, raio) no espaço do objeto
+        self._pending = {}    # (chave, resolução) -> future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _key(self, shape, params):
+        return shape, tuple(sorted(params.items()))
+
+    def _build(self, key, resolution):
+        shape, params = key
+        try:
+            mesh = BUILDERS[shape](**dict(params), resolution=resolution)
+            with self._lock:
+                self._cache[(key, resolution)] = mesh
+        finally:
+            # Mesmo se a geração falhar o nível deixa de estar pendente e pode ser pedido de novo
+            with self._lock:
+                self._pending.pop((key, resolution), None)
+        return mesh
+
+    def _request(self, key, resolution):
+        # Agenda a geração do nível em segundo plano, uma única vez
+        with self._lock:
+            if (key, resolution) in self._cache or (key, resolution) in self._pending:
+                return
+            self._pending[(key, resolution)] = self._executor.submit(self._build, key, resolution)
+
+    def bounding_sphere(self, shape, params):
+        """ Esfera envolvente no espaço do objeto, calculada a partir do nível mais simples. """
+        key = self._key(shape, params)
+        if key not in self._spheres:
+            coarsest = self._cache.get((key, self.levels[0])) or self._build(key, self.levels[0])
+            vertices = coarsest[0]
+            center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+            radius = np.linalg.norm(vertices - center, axis=1).max()
+            self._spheres[key] = (center, radius)
+        return self._spheres[key]
+
+    def required_resolution(self, shape, params, model_matrix, view_matrix, focal_px):
+        """ Resolução mínima para que uma célula da grade projete no máximo pixel_error pixels. """
+        center, radius = self.bounding_sphere(shape, params)
+
+        # Centro e raio da esfera no sistema da câmera (a escala é a maior entre os eixos do modelo)
+        world_center = model_matrix @ np.append(center, 1)
+        camera_center = view_matrix @ world_center
+        world_radius = radius * np.linalg.norm(model_matrix[:3, :3], axis=0).max()
+
+        # A câmera de look_at olha para -Z
+        depth = -camera_center[2]
+        if depth <= world_radius:
+            return np.inf
+
+        # Uma grade com `resolution` amostras divide o diâmetro em (resolution - 1) células
+        diameter_px = 2 * world_radius * focal_px / depth
+        return diameter_px / self.pixel_error + 1
+
+    def select(self, shape, params, model_matrix, view_matrix, focal_px):
+        """ Retorna (vértices, faces, resolução) do nível a usar neste quadro. """
+        key = self._key(shape, params)
+        needed = self.required_resolution(shape, params, model_matrix, view_matrix, focal_px)
+        target = next((level for level in self.levels if level >= needed), self.levels[-1])
+
+        mesh = self._cache.get((key, target))
+        if mesh is not None:
+            return mesh[0], mesh[1], target
+
+        self._request(key, target)
+
+        # Enquanto o nível pedido não fica pronto, usa o nível disponível mais próximo
+        available = [level for level in self.levels if (key, level) in self._cache]
+        closest = min(available, key=lambda level: abs(level - target))
+        vertices, faces = self._cache[(key, closest)]
+        return vertices, faces, closest
+
+    def select_scene(self, objects, view_matrix, focal_px):
+        """ Escolhe o nível de cada objeto e aplica as suas transformações, como em create_scene. """
+        scene = []
+        chosen = []
+        for obj in objects:
+            model = get_transformation_matrix(obj['scale'], obj['rot'], obj['trans'])
+            vertices, faces, resolution = self.select(obj['shape'], obj['params'], model, view_matrix, focal_px)
+            transformed = apply_transformations(vertices, scale=obj['scale'], rotation=obj['rot'],
+                                                translation=obj['trans'])
+            scene.append((transformed, faces))
+            chosen.append(resolution)
+        return scene, chosen
+
+    def wait(self):
+        # Aguarda os níveis que estão sendo gerados
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+if __name__ == "__main__":
+
+    objects = [
+        {'shape': 'open_box', 'params': {'side': 4, 'height': 3, 'wall_thickness': 0.15},
+         'scale': 2, 'rot': (0, 30, 0), 'trans': (-7, 7, 0)},
+        {'shape': 'cone', 'params': {'radius': 2, 'height': 6},
+         'scale': 1, 'rot': (45, 0, 0), 'trans': (5, 5, -4)},
+        {'shape': 'frustum', 'params': {'r_lower': 3, 'r_upper': 1, 'height': 4},
+         'scale': 1.5, 'rot': (0, 0, -30), 'trans': (-8, -8, 4)},
+    ]
+
+    manager = LODManager(levels=(10, 20, 40, 70), pixel_error=2.0)
+    focal_px = focal_length_in_pixels(60, 480)
+
+    # A câmera se aproxima da cena; os níveis escolhidos acompanham o tamanho na tela
+    for distance in (200, 100, 50, 25):
+        eye = np.array([distance, distance, distance], dtype=float)
+        view = look_at(eye, np.array([0, 0, 0]), np.array([0, 0, 1]))
+        scene, chosen = manager.select_scene(objects, view, focal_px)
+        print(f"Distância {distance:>4}: resoluções {chosen}")
+        manager.wait()
+
+    manager.close()
@@ -52,10 +52,10 @@ def get_rotation_matrix_z(degrees):
         [0, 0, 0, 1]
     ])
 
-def apply_transformations(vertices, scale=1, rotation=(0,0,0), translation=(0,0,0)):
+def get_transformation_matrix(scale=1, rotation=(0,0,0), translation=(0,0,0)):
 
     # Criar matriz de transformação combinada
-    transformation_matrix = (
+    return (
         get_translation_matrix(translation) @
         get_rotation_matrix_z(rotation[2]) @
         get_rotation_matrix_y(rotation[1]) @
@@ -63,6 +63,10 @@ def apply_transformations(vertices, scale=1, rotation=(0,0,0), translation=(0,0,
         get_scale_matrix(scale)
     )
 
+def apply_transformations(vertices, scale=1, rotation=(0,0,0), translation=(0,0,0)):
+
+    transformation_matrix = get_transformation_matrix(scale, rotation, translation)
+
     # Converter vértices para coordenadas homogêneas (adicionar uma dimensão extra de 1)
     homogeneous_vertices = np.hstack([vertices, np.ones((vertices.shape[0], 1))])
 
@@ -72,6 +76,32 @@ def apply_transformations(vertices, scale=1, rotation=(0,0,0), translation=(0,0,
     # Remover a dimensão homogênea e retornar os vértices transformados
     return transformed_vertices[:, :3]
 
+def create_instances(vertices, faces, poses):
+    """ Cria uma malha instanciada: uma única malha base e uma matriz (K, 4, 4) com a pose de cada instância. """
+    if len(poses) == 0:
+        raise ValueError("Uma malha instanciada precisa de pelo menos uma pose.")
+
+    transforms = np.array([
+        get_transformation_matrix(
+            pose.get('scale', 1),
+            pose.get('rot', (0, 0, 0)),
+            pose.get('trans', (0, 0, 0))
+        )
+        for pose in poses
+    ]).reshape(-1, 4, 4)
+
+    return {'verts': vertices, 'faces': faces, 'transforms': transforms}
+
+def transform_instances(vertices, transforms):
+    """ Aplica as K transformações à malha base de uma vez, retornando um array (K, N, 3). """
+    transforms = np.asarray(transforms)
+
+    # Separar a parte linear (K, 3, 3) e a translação (K, 3) evita criar coordenadas homogêneas
+    linear = transforms[:, :3, :3]
+    translation = transforms[:, :3, 3]
+
+    return np.einsum('nj,kij->kni', vertices, linear) + translation[:, None, :]
+
 def create_scene():
     # Gerar objetos base
     box_verts, box_faces = create_open_box(side=4, height=3, wall_thickness=0.15, resolution=20)
@@ -124,6 +154,34 @@ def create_scene():
 
     return scene
 
+def create_instanced_scene(copies=8):
+    """
+    Cena instanciada: lista de dicts {'verts', 'faces', 'transforms'} (ver create_instances),
+    e não de tuplas (verts, faces) como create_scene. Para as funções de plot, use expand_instances.
+    """
+    # Uma única malha de cone repetida em um anel de poses diferentes
+    cone_verts, cone_faces = create_cone(radius=1, height=3, resolution=20)
+
+    angles = np.linspace(0, 360, copies, endpoint=False)
+    poses = [
+        {
+            'scale': 1,
+            'rot': (0, 0, angle),
+            'trans': (8 * np.cos(np.radians(angle)), 8 * np.sin(np.radians(angle)), 0)
+        }
+        for angle in angles
+    ]
+
+    return [create_instances(cone_verts, cone_faces, poses)]
+
+def expand_instances(instanced_scene):
+    # Converte uma cena instanciada para o formato de create_scene: uma tupla (verts, faces) por instância
+    scene = []
+    for entry in instanced_scene:
+        for verts in transform_instances(entry['verts'], entry['transforms']):
+            scene.append((verts, entry['faces']))
+    return scene
+
 def plot_scene(scene):
 
     fig = plt.figure(figsize=(8, 6))
@@ -136,7 +194,7 @@ def plot_scene(scene):
         mesh = Poly3DCollection(verts[faces],
                                 alpha=0.8,
                                 edgecolor='k',
-                                facecolor=colors[idx])
+                                facecolor=colors[idx % len(colors)])
         ax.add_collection3d(mesh)
 
     # Configurar limites fixos
@@ -1,6 +1,8 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from test import create_line, create_open_box, create_cone, create_frustum
+from test_2 import transform_instances, create_instanced_scene
 
 def bresenham_line(x0, y0, x1, y1, image):
 
@@ -25,19 +27,21 @@ def bresenham_line(x0, y0, x1, y1, image):
             err += dx
             y0 += sy
 
-def rasterize_objects(vertices_2d, faces, resolution):
-    """ Rasteriza os objetos desenhando linhas entre os vértices manualmente. """
-    # Cria uma imagem em branco (branco representado por 255)
-    image = np.ones((resolution[1], resolution[0])) * 255
+def scale_to_image(vertices_2d, resolution):
+    """ Escala os vértices 2D (N, 2) para as coordenadas da imagem. """
+    minimum = vertices_2d.min(axis=0)
 
     # Escala os vértices para o tamanho da imagem
-    scale_x = resolution[0] / (vertices_2d[:, 0].max() - vertices_2d[:, 0].min())
-    scale_y = resolution[1] / (vertices_2d[:, 1].max() - vertices_2d[:, 1].min())
+    scale_x = resolution[0] / (vertices_2d[:, 0].max() - minimum[0])
+    scale_y = resolution[1] / (vertices_2d[:, 1].max() - minimum[1])
     scale = min(scale_x, scale_y)
 
     # Centraliza os vértices na imagem
-    vertices_scaled = (vertices_2d - vertices_2d.min(axis=0)) * scale
+    vertices_scaled = (vertices_2d - minimum) * scale
     vertices_scaled[:, 1] = resolution[1] - vertices_scaled[:, 1]  # Inverte Y para coordenadas de imagem
+    return vertices_scaled
+
+def draw_faces(vertices_scaled, faces, image):
 
     # Desenha as faces ou arestas
     for face in faces:
@@ -46,8 +50,59 @@ def rasterize_objects(vertices_2d, faces, resolution):
             end = vertices_scaled[face[(i + 1) % len(face)]].astype(int)
             bresenham_line(start[0], start[1], end[0], end[1], image)
 
+def rasterize_objects(vertices_2d, faces, resolution):
+    """ Rasteriza os objetos desenhando linhas entre os vértices manualmente. """
+    # Cria uma imagem em branco (branco representado por 255)
+    image = np.ones((resolution[1], resolution[0])) * 255
+
+    vertices_scaled = scale_to_image(vertices_2d, resolution)
+    draw_faces(vertices_scaled, faces, image)
+
     return image
 
+def rasterize_instanced_scene(scene, resolution, view_matrix=None, focal_length=5, plane="xy"):
+    """
+    Rasteriza uma cena instanciada: lista de dicts {'verts', 'faces', 'transforms' (K, 4, 4)},
+    como a retornada por test_2.create_instanced_scene.
+    """
+    image = np.ones((resolution[1], resolution[0])) * 255
+
+    projected = []
+    for entry in scene:
+        # Combina a câmera com a pose de cada instância numa única matriz por instância
+        transforms = np.asarray(entry['transforms']).reshape(-1, 4, 4)
+        if len(transforms) == 0 or len(entry['verts']) == 0:
+            continue
+        if view_matrix is not None:
+            transforms = view_matrix @ transforms
+
+        # Transformação e projeção de todas as instâncias numa única operação
+        instance_verts = transform_instances(entry['verts'], transforms)
+        count, n_verts = instance_verts.shape[:2]
+        verts_2d = perspective_projection(instance_verts.reshape(-1, 3), focal_length=focal_length, plane=plane)
+        projected.append((verts_2d, count, n_verts, entry['faces']))
+
+    # Sem instâncias não há o que desenhar
+    if not projected:
+        return image
+
+    # A escala é comum a todas as instâncias para manter as posições relativas
+    vertices_scaled = scale_to_image(np.concatenate([verts_2d for verts_2d, _, _, _ in projected]), resolution)
+
+    offset = 0
+    for _, count, n_verts, faces in projected:
+        block = vertices_scaled[offset:offset + count * n_verts].reshape(count, n_verts, 2)
+        offset += count * n_verts
+        for instance in block:
+            draw_faces(instance, faces, image)
+
+    return image
+
+def rasterize_instances(vertices, faces, transforms, resolution, view_matrix=None, focal_length=5, plane="xy"):
+    """ Rasteriza K instâncias de uma mesma malha a partir das suas matrizes (K, 4, 4). """
+    scene = [{'verts': vertices, 'faces': faces, 'transforms': transforms}]
+    return rasterize_instanced_scene(scene, resolution, view_matrix, focal_length, plane)
+
 def perspective_projection(vertices, focal_length=5, plane="xy"):
     if plane == "xy":
         vertices_2d = vertices[:, :2] / (vertices[:, 2:3] + focal_length)
@@ -60,7 +115,94 @@ def perspective_projection(vertices, focal_length=5, plane="xy"):
 
     return vertices_2d
 
-def rasterize_scene(object_index, resolutions):
+def min_pool_2x(image):
+    """ Reduz a imagem pela metade mantendo o mínimo de cada bloco 2x2, para que as linhas pretas não sumam. """
+    height, width = image.shape[0] // 2 * 2, image.shape[1] // 2 * 2
+    blocks = image[:height, :width].reshape(height // 2, 2, width // 2, 2)
+    return blocks.min(axis=(1, 3))
+
+def build_mip_pyramid(image, levels, timings=None):
+    """
+    Gera a pirâmide de imagens a partir da imagem em alta resolução, com `levels` níveis além dela.
+    Se `timings` for uma lista, recebe o tempo (s) de cada redução.
+    """
+    pyramid = [image]
+    for _ in range(levels):
+        if min(pyramid[-1].shape) < 2:
+            break
+        start = time.perf_counter()
+        pyramid.append(min_pool_2x(pyramid[-1]))
+        if timings is not None:
+            timings.append(time.perf_counter() - start)
+    return pyramid
+
+def rasterize_multi_resolution(vertices_2d, faces, resolutions, mode="shared"):
+    """
+    Rasteriza os vértices 2D em várias resoluções e retorna {(largura, altura): (imagem, tempo em segundos)}.
+
+    mode="shared": calcula o mínimo e a extensão dos vértices uma única vez e desenha cada resolução
+    a partir deles; o tempo de cada resolução cobre a escala para a tela e o desenho de todas as faces.
+    mode="pyramid": rasteriza apenas a maior resolução e gera as demais por redução 2x2 (mip pyramid).
+    As resoluções pedidas precisam formar uma cadeia de potências de 2 (ex.: 1280x960, 640x480, 320x240).
+    O tempo de cada nível é acumulado: rasterização da base mais todas as reduções até aquele nível.
+    """
+    if mode == "pyramid":
+        return _rasterize_pyramid(vertices_2d, faces, resolutions)
+
+    if mode != "shared":
+        raise ValueError("Modo inválido! Escolha entre 'shared' ou 'pyramid'.")
+
+    # Mínimo e extensão são calculados uma vez e reaproveitados em todas as resoluções
+    minimum = vertices_2d.min(axis=0)
+    extent = vertices_2d.max(axis=0) - minimum
+
+    # Arestas de todas as faces, como listas de inteiros do Python
+    edges = [(face[i], face[(i + 1) % len(face)]) for face in faces.tolist() for i in range(len(face))]
+
+    results = {}
+    for resolution in resolutions:
+        start = time.perf_counter()
+        image = np.ones((resolution[1], resolution[0])) * 255
+
+        # Mesma escala de scale_to_image: uma extensão nula dá escala infinita e o min fica com a outra
+        scale = min(resolution[0] / extent[0], resolution[1] / extent[1])
+        scaled = (vertices_2d - minimum) * scale
+        scaled[:, 1] = resolution[1] - scaled[:, 1]  # Inverte Y para coordenadas de imagem
+        screen = scaled.astype(int).tolist()
+
+        for a, b in edges:
+            bresenham_line(screen[a][0], screen[a][1], screen[b][0], screen[b][1], image)
+
+        results[tuple(resolution)] = (image, time.perf_counter() - start)
+
+    return results
+
+def _rasterize_pyramid(vertices_2d, faces, resolutions):
+    ordered = sorted((tuple(r) for r in resolutions), reverse=True)
+    largest = ordered[0]
+
+    # Cada resolução pedida precisa ser a maior dividida por uma potência de 2
+    levels = {}
+    for width, height in ordered:
+        ratio = largest[0] // width
+        if (width * ratio, height * ratio) != largest or ratio & (ratio - 1):
+            raise ValueError("No modo 'pyramid' as resoluções devem ser a maior dividida por potências de 2.")
+        levels[ratio.bit_length() - 1] = (width, height)
+
+    start = time.perf_counter()
+    image = rasterize_objects(vertices_2d, faces, largest)
+    elapsed = [time.perf_counter() - start]
+
+    timings = []
+    pyramid = build_mip_pyramid(image, max(levels), timings)
+
+    # Tempo acumulado: rasterização da base + reduções até cada nível
+    for reduction in timings:
+        elapsed.append(elapsed[-1] + reduction)
+
+    return {resolution: (pyramid[level], elapsed[level]) for level, resolution in levels.items()}
+
+def rasterize_scene(object_index, resolutions, mode="shared"):
     object_names = ["Caixa Aberta", "Cone", "Tronco de Cone", "Linha"]
 
     # Verifica se o índice do objeto é válido
@@ -87,16 +229,18 @@ def rasterize_scene(object_index, resolutions):
     else:  # Para outros objetos, projeta apenas nos planos XY e YZ
         planes = ["xy", "yz"]
 
-    # Rasteriza o objeto em cada resolução e plano
+    # Rasteriza o objeto em cada plano, projetando os vértices apenas uma vez por plano
     for plane in planes:
-        for idx, resolution in enumerate(resolutions):
-            print(f"Rasterizando {object_names[object_index]} no plano {plane.upper()} em resolução {resolution}...")
+        print(f"Rasterizando {object_names[object_index]} no plano {plane.upper()} em {len(resolutions)} resoluções...")
 
-            # Projeta os vértices em 2D no plano selecionado
-            verts_2d = perspective_projection(vertices, focal_length=5, plane=plane)
+        # Projeta os vértices em 2D no plano selecionado
+        verts_2d = perspective_projection(vertices, focal_length=5, plane=plane)
 
-            # Rasteriza o objeto na imagem
-            img = rasterize_objects(verts_2d, faces, resolution)
+        # Rasteriza o objeto em todas as resoluções
+        images = rasterize_multi_resolution(verts_2d, faces, resolutions, mode=mode)
+
+        for resolution, (img, elapsed) in images.items():
+            print(f"  {resolution[0]}x{resolution[1]}: {elapsed * 1000:.1f} ms")
 
             # Exibe a imagem usando matplotlib
             plt.figure(figsize=(8, 6))
@@ -113,12 +257,20 @@ if __name__ == "__main__":
         (1280, 720)  # Resolução alta
     ]
 
+    # O modo pirâmide só gera resoluções que são a maior dividida por potências de 2
+    pyramid_resolutions = [
+        (320, 240),
+        (640, 480),
+        (1280, 960)
+    ]
+
     while True:
         print("\nEscolha o objeto para rasterizar:")
         print("1 - Caixa Aberta")
         print("2 - Cone")
         print("3 - Tronco de Cone")
         print("4 - Linha")
+        print("5 - Anel de cones instanciados")
         print("0 - Sair")
         escolha = input("Digite o número da opção desejada: ")
 
@@ -127,6 +279,18 @@ if __name__ == "__main__":
             print("Saindo...")
             break
 
+        # Uma única malha de cone desenhada em várias poses
+        if escolha == "5":
+            instanced_scene = create_instanced_scene()
+            for resolution in resolutions:
+                img = rasterize_instanced_scene(instanced_scene, resolution, focal_length=20)
+                plt.figure(figsize=(8, 6))
+                plt.title(f"Cones instanciados ({resolution[0]}x{resolution[1]})")
+                plt.imshow(img, cmap="gray")
+                plt.axis("off")
+                plt.show()
+            continue
+
         # Converte a escolha para inteiro e ajusta o índice
         try:
             object_index = int(escolha) - 1  # Subtrai 1 para corresponder aos índices dos objetos
@@ -139,5 +303,10 @@ if __name__ == "__main__":
             print("Índice de objeto inválido! Escolha um número entre 1 e 4.")
             continue
 
-        # Rasteriza o objeto escolhido nas três resoluções
-        rasterize_scene(object_index, resolutions)
+        modo = input("Modo (1 - Rasterizar cada resolução, 2 - Pirâmide de imagens): ")
+        if modo == "2":
+            # Rasteriza apenas 1280x960 e reduz para as demais resoluções
+            rasterize_scene(object_index, pyramid_resolutions, mode="pyramid")
+        else:
+            # Rasteriza o objeto escolhido nas três resoluções
+            rasterize_scene(object_index, resolutions)
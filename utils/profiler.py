@@ -0,0 +1,276 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+# Instrumentação opcional do pipeline. Desativada, cada ponto instrumentado custa
+# apenas a verificação de uma variável global. enable() (ou a variável de ambiente
+# RASTER3D_PROFILE=1) liga a gravação; as funções do pipeline só passam a ser medidas
+# depois de instrument_pipeline(), que pode ser desfeito com uninstrument().
+_enabled = os.environ.get("RASTER3D_PROFILE", "") not in ("", "0")
+_events = []
+_totals = {}
+_lock = threading.Lock()
+_origin = time.perf_counter_ns()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _origin
+    with _lock:
+        _events.clear()
+        _totals.clear()
+        _origin = time.perf_counter_ns()
+
+
+class _NullStage:
+    # Retornado por stage() quando a instrumentação está desativada
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def count(self, **counters):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+
+    __slots__ = ("name", "category", "counters", "start")
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+        self.counters = {}
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.category, self.start, time.perf_counter_ns() - self.start, self.counters)
+        return False
+
+    def count(self, **counters):
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+def stage(name, category="pipeline"):
+    """ Context manager que mede o tempo de um trecho; use .count(...) para somar contadores. """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, category)
+
+
+def count(name, **counters):
+    """ Soma contadores a uma etapa sem medir tempo. """
+    if not _enabled:
+        return
+    with _lock:
+        total = _totals.setdefault(name, {"calls": 0, "time_ms": 0.0})
+        for key, value in counters.items():
+            total[key] = total.get(key, 0) + value
+
+
+def profiled(name=None, category="pipeline", counters=None, arg_counters=None):
+    """
+    Decorador que mede cada chamada; counters(resultado) retorna um dict de contadores.
+    Para funções que não retornam nada, arg_counters(*args, **kwargs) calcula os contadores a partir dos argumentos.
+    Os contadores são calculados depois de medir o tempo, sem afetá-lo.
+    """
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            start = time.perf_counter_ns()
+            result = func(*args, **kwargs)
+            elapsed = time.perf_counter_ns() - start
+
+            found = counters(result) if counters else {}
+            if arg_counters:
+                found.update(arg_counters(*args, **kwargs))
+            _record(stage_name, category, start, elapsed, found)
+            return result
+
+        wrapper.__profiled__ = func
+        return wrapper
+
+    return decorator
+
+
+def _record(name, category, start, elapsed, counters):
+    with _lock:
+        _events.append((name, category, start, elapsed, threading.get_ident(), counters))
+        total = _totals.setdefault(name, {"calls": 0, "time_ms": 0.0})
+        total["calls"] += 1
+        total["time_ms"] += elapsed / 1e6
+        for key, value in counters.items():
+            total[key] = total.get(key, 0) + value
+
+
+def summary():
+    """ Retorna os totais por etapa: chamadas, tempo em ms e contadores. """
+    with _lock:
+        return {name: dict(total) for name, total in _totals.items()}
+
+
+def report():
+    for name, total in sorted(summary().items(), key=lambda item: -item[1]["time_ms"]):
+        extras = ", ".join(f"{k}={v}" for k, v in total.items() if k not in ("calls", "time_ms"))
+        print(f"{name:<28} {total['calls']:>6} chamadas {total['time_ms']:>10.2f} ms  {extras}")
+
+
+def export_json(path):
+    with open(path, "w") as f:
+        json.dump(summary(), f, indent=2)
+
+
+def export_chrome_trace(path):
+    """ Exporta os eventos no formato do Chrome Trace (chrome://tracing ou Perfetto). """
+    with _lock:
+        events = [
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - _origin) / 1000,
+                "dur": elapsed / 1000,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": counters,
+            }
+            for name, category, start, elapsed, tid, counters in _events
+        ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+# Contadores extraídos do resultado de cada função do pipeline. "output_bytes" é o
+# tamanho do resultado, não o total alocado durante a chamada: medir alocações exigiria
+# o tracemalloc, que deixa todo o processo mais lento e, no Python 3.8 (sem reset_peak),
+# não separa o pico de etapas aninhadas. O pico por caso fica com benchmarks/run_benchmarks.py.
+
+def _count_grid(matriz):
+    return {"voxels": int(matriz.size), "output_bytes": int(matriz.nbytes)}
+
+
+def _count_mesh(result):
+    vertices, faces = result[0], result[1]
+    return {"vertices": len(vertices), "faces": len(faces), "output_bytes": int(vertices.nbytes + faces.nbytes)}
+
+
+def _count_vertices(vertices):
+    return {"vertices": int(vertices.size // vertices.shape[-1]), "output_bytes": int(vertices.nbytes)}
+
+
+def _count_image(result):
+    images = [image for image, _ in result.values()] if isinstance(result, dict) else [result]
+    return {
+        "pixels_written": int(sum((image == 0).sum() for image in images)),
+        "output_bytes": int(sum(image.nbytes for image in images)),
+    }
+
+
+def _count_lines(vertices_scaled, faces, image=None):
+    # Linhas desenhadas por draw_faces e pixels percorridos por bresenham_line (inclusive fora
+    # da imagem), somados de uma vez para a chamada inteira em vez de um evento por linha
+    points = np.asarray(vertices_scaled).astype(int)
+    faces = np.asarray(faces)
+    steps = np.abs(points[np.roll(faces, -1, axis=1)] - points[faces]).max(axis=-1) + 1
+    return {"lines": int(faces.size), "pixels": int(steps.sum())}
+
+
+PIPELINE = {
+    "generate_cone": ("generate", _count_grid),
+    "generate_truncked_cone": ("generate", _count_grid),
+    "generate_open_box": ("generate", _count_grid),
+    "create_open_box": ("generate", _count_mesh),
+    "create_cone": ("generate", _count_mesh),
+    "create_frustum": ("generate", _count_mesh),
+    "create_line": ("generate", _count_mesh),
+    "marching_cubes": ("surface", _count_mesh),
+    "apply_transformations": ("transform", _count_vertices),
+    "transform_instances": ("transform", _count_vertices),
+    "transform_to_camera": ("camera", _count_vertices),
+    "projetar_xy": ("projection", _count_vertices),
+    "projetar_yz": ("projection", _count_vertices),
+    "projetar_zx": ("projection", _count_vertices),
+    "perspective_projection": ("projection", _count_vertices),
+    "rasterize_objects": ("rasterize", _count_image),
+    "rasterize_instances": ("rasterize", _count_image),
+    "rasterize_instanced_scene": ("rasterize", _count_image),
+    "rasterize_multi_resolution": ("rasterize", _count_image),
+    "draw_faces": ("rasterize", None),
+}
+
+# Funções cujos contadores vêm dos argumentos
+PIPELINE_ARG_COUNTERS = {
+    "draw_faces": _count_lines,
+}
+
+PIPELINE_MODULES = [
+    "polygon.cone", "polygon.truncked_cone", "polygon.open_box",
+    "utils.plot_3d", "utils.voxel_volume", "skimage.measure",
+    "test", "test_2", "test_3", "test_4", "test_5",
+]
+
+
+# Funções substituídas por instrument_pipeline: (módulo, nome, original)
+_patched = []
+
+
+def instrument_pipeline():
+    """
+    Substitui as funções do pipeline por versões instrumentadas em todos os módulos já importados.
+    Como os scripts usam "from modulo import funcao", cada módulo que guarda a função é atualizado.
+    Isso inclui skimage.measure.marching_cubes; use uninstrument() para restaurar as originais.
+    """
+    wrappers = {}
+    for module_name in PIPELINE_MODULES:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for func_name, (category, counters) in PIPELINE.items():
+            func = getattr(module, func_name, None)
+            if not callable(func) or hasattr(func, "__profiled__"):
+                continue
+            if id(func) not in wrappers:
+                wrappers[id(func)] = profiled(func_name, category, counters,
+                                              PIPELINE_ARG_COUNTERS.get(func_name))(func)
+            _patched.append((module, func_name, func))
+            setattr(module, func_name, wrappers[id(func)])
+    return len(wrappers)
+
+
+def uninstrument():
+    """ Restaura as funções originais substituídas por instrument_pipeline. """
+    while _patched:
+        module, func_name, func = _patched.pop()
+        setattr(module, func_name, func)
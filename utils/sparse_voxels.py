@@ -0,0 +1,170 @@
+import numpy as np
+
+
+class BrickMap:
+    """
+    Matriz de voxels esparsa organizada em blocos (bricks) cúbicos.
+
+    Bricks vazios não ocupam memória, bricks totalmente cheios guardam apenas a chave
+    e somente os bricks mistos (na superfície do objeto) guardam os seus voxels.
+    Assim a memória cresce com a área da superfície e não com o volume da caixa envolvente.
+    """
+
+    def __init__(self, shape, tamanho_brick=8):
+        self.shape = tuple(int(n) for n in shape)
+        self.tamanho_brick = tamanho_brick
+        self.n_bricks = tuple(-(-n // tamanho_brick) for n in self.shape)
+
+        # Chaves lineares ordenadas dos bricks cheios e dos bricks mistos
+        self.chaves_cheias = np.zeros(0, dtype=np.int64)
+        self.chaves = np.zeros(0, dtype=np.int64)
+        self.blocos = np.zeros((0,) + (tamanho_brick,) * 3, dtype=bool)
+
+    @classmethod
+    def from_dense(cls, matriz, tamanho_brick=8, nivel=0.5):
+        """ Converte uma matriz densa (como as de polygon/) processando uma camada de bricks por vez. """
+        mapa = cls(matriz.shape, tamanho_brick)
+        b = tamanho_brick
+        nb0, nb1, nb2 = mapa.n_bricks
+        cheio = b ** 3
+
+        cheias, chaves, blocos = [], [], []
+        for bi in range(nb0):
+            # Camada com a altura de um brick, completada com zeros até múltiplos de b
+            camada = np.zeros((b, nb1 * b, nb2 * b), dtype=bool)
+            fatia = matriz[bi * b:(bi + 1) * b]
+            camada[:fatia.shape[0], :fatia.shape[1], :fatia.shape[2]] = fatia > nivel
+
+            # (b, nb1, b, nb2, b) -> (nb1, nb2, b, b, b)
+            bricks = camada.reshape(b, nb1, b, nb2, b).transpose(1, 3, 0, 2, 4)
+            contagem = bricks.sum(axis=(2, 3, 4))
+
+            base = bi * nb1 * nb2
+            lineares = base + np.arange(nb1 * nb2, dtype=np.int64).reshape(nb1, nb2)
+            mistos = (contagem > 0) & (contagem < cheio)
+
+            cheias.append(lineares[contagem == cheio])
+            chaves.append(lineares[mistos])
+            blocos.append(bricks[mistos])
+
+        # As chaves já saem em ordem crescente, camada por camada
+        mapa.chaves_cheias = np.concatenate(cheias)
+        mapa.chaves = np.concatenate(chaves)
+        mapa.blocos = np.concatenate(blocos)
+        return mapa
+
+    def nbytes(self):
+        return self.chaves_cheias.nbytes + self.chaves.nbytes + self.blocos.nbytes
+
+    def contains(self, pontos):
+        """ Consulta vetorizada: retorna se cada ponto inteiro (N, 3) está ocupado. """
+        pontos = np.asarray(pontos, dtype=np.int64)
+        ocupado = np.zeros(len(pontos), dtype=bool)
+
+        validos = np.all((pontos >= 0) & (pontos < self.shape), axis=1)
+        p = pontos[validos]
+        brick = p // self.tamanho_brick
+        local = p % self.tamanho_brick
+        chave = self._linear(brick[:, 0], brick[:, 1], brick[:, 2])
+
+        resultado = _pertence(self.chaves_cheias, chave)
+        idx, misto = _localizar(self.chaves, chave)
+        resultado[misto] = self.blocos[idx[misto], local[misto, 0], local[misto, 1], local[misto, 2]]
+
+        ocupado[validos] = resultado
+        return ocupado
+
+    def query_region(self, inicio, fim):
+        """ Retorna a região [inicio, fim) como um bloco denso booleano. """
+        inicio = np.maximum(np.asarray(inicio, dtype=np.int64), 0)
+        fim = np.minimum(np.asarray(fim, dtype=np.int64), self.shape)
+        if np.any(fim <= inicio):
+            return np.zeros(np.maximum(fim - inicio, 0), dtype=bool)
+
+        b = self.tamanho_brick
+        b0 = inicio // b
+        b1 = (fim - 1) // b + 1
+        n = b1 - b0
+
+        bi, bj, bk = np.meshgrid(*(np.arange(a, z) for a, z in zip(b0, b1)), indexing="ij")
+        chave = self._linear(bi.ravel(), bj.ravel(), bk.ravel())
+
+        # Monta todos os bricks da região de uma vez
+        bricks = np.zeros((len(chave), b, b, b), dtype=bool)
+        bricks[_pertence(self.chaves_cheias, chave)] = True
+        idx, misto = _localizar(self.chaves, chave)
+        bricks[misto] = self.blocos[idx[misto]]
+
+        # (n0, n1, n2, b, b, b) -> matriz densa alinhada aos bricks, depois recortada
+        denso = bricks.reshape(n[0], n[1], n[2], b, b, b).transpose(0, 3, 1, 4, 2, 5)
+        denso = denso.reshape(n[0] * b, n[1] * b, n[2] * b)
+        deslocamento = inicio - b0 * b
+        return denso[tuple(slice(d, d + t) for d, t in zip(deslocamento, fim - inicio))]
+
+    def to_dense(self, dtype=float):
+        """ Converte de volta para a matriz densa usada por marching_cubes. """
+        return self.query_region((0, 0, 0), self.shape).astype(dtype)
+
+    def fill_region(self, inicio, fim, valor=1):
+        """ Preenche (valor=1) ou limpa (valor=0) a região [inicio, fim) sem materializar a matriz densa. """
+        inicio = np.maximum(np.asarray(inicio, dtype=np.int64), 0)
+        fim = np.minimum(np.asarray(fim, dtype=np.int64), self.shape)
+        if np.any(fim <= inicio):
+            return
+
+        b = self.tamanho_brick
+        faixas = [np.arange(a // b, (z - 1) // b + 1) for a, z in zip(inicio, fim)]
+
+        # Bricks totalmente cobertos pela região em cada eixo
+        cobertos = [(f * b >= a) & ((f + 1) * b <= z) for f, a, z in zip(faixas, inicio, fim)]
+
+        bi, bj, bk = np.meshgrid(*faixas, indexing="ij")
+        ci, cj, ck = np.meshgrid(*cobertos, indexing="ij")
+        chave = self._linear(bi.ravel(), bj.ravel(), bk.ravel())
+        inteiro = (ci & cj & ck).ravel()
+
+        # Bricks parciais: materializa, altera a parte coberta e reclassifica
+        parciais = chave[~inteiro]
+        coords = np.stack([bi.ravel(), bj.ravel(), bk.ravel()], axis=1)[~inteiro]
+        conteudo = np.zeros((len(parciais), b, b, b), dtype=bool)
+        conteudo[_pertence(self.chaves_cheias, parciais)] = True
+        idx, misto = _localizar(self.chaves, parciais)
+        conteudo[misto] = self.blocos[idx[misto]]
+
+        for n, coord in enumerate(coords):
+            a = np.maximum(inicio - coord * b, 0)
+            z = np.minimum(fim - coord * b, b)
+            conteudo[n, a[0]:z[0], a[1]:z[1], a[2]:z[2]] = bool(valor)
+
+        contagem = conteudo.sum(axis=(1, 2, 3))
+        novas_cheias = parciais[contagem == b ** 3]
+        novos_mistos = (contagem > 0) & (contagem < b ** 3)
+
+        # Remove os bricks alterados e insere a nova classificação
+        alterados = np.sort(chave)
+        manter = ~_pertence(alterados, self.chaves)
+        chaves = np.concatenate([self.chaves[manter], parciais[novos_mistos]])
+        blocos = np.concatenate([self.blocos[manter], conteudo[novos_mistos]])
+        ordem = np.argsort(chaves, kind="stable")
+        self.chaves, self.blocos = chaves[ordem], blocos[ordem]
+
+        cheias = self.chaves_cheias[~_pertence(alterados, self.chaves_cheias)]
+        if valor:
+            cheias = np.concatenate([cheias, chave[inteiro]])
+        self.chaves_cheias = np.sort(np.concatenate([cheias, novas_cheias]))
+
+    def _linear(self, bi, bj, bk):
+        _, nb1, nb2 = self.n_bricks
+        return (np.asarray(bi, dtype=np.int64) * nb1 + bj) * nb2 + bk
+
+
+def _localizar(ordenadas, chaves):
+    # Busca vetorizada em um array ordenado: retorna (índices, encontrado)
+    if len(ordenadas) == 0:
+        return np.zeros(len(chaves), dtype=np.int64), np.zeros(len(chaves), dtype=bool)
+    idx = np.minimum(np.searchsorted(ordenadas, chaves), len(ordenadas) - 1)
+    return idx, ordenadas[idx] == chaves
+
+
+def _pertence(ordenadas, chaves):
+    return _localizar(ordenadas, chaves)[1]
@@ -0,0 +1,156 @@
+import numpy as np
+from skimage.measure import marching_cubes
+
+
+class VoxelVolume:
+    """ Volume de voxels editável, dividido em chunks com re-extração incremental da malha. """
+
+    def __init__(self, matriz, tamanho_chunk=32, nivel=0.5, espacamento=(1, 1, 1)):
+        self.matriz = np.array(matriz, dtype=float)
+        self.tamanho_chunk = tamanho_chunk
+        self.nivel = nivel
+        self.espacamento = np.asarray(espacamento, dtype=float)
+
+        # Número de chunks em cada eixo (o último chunk pode ser menor)
+        self.n_chunks = tuple(-(-n // tamanho_chunk) for n in self.matriz.shape)
+
+        # Malha já extraída de cada chunk: índice do chunk -> (vértices, faces)
+        self.malhas = {}
+
+        # No início todos os chunks precisam ser extraídos
+        self.sujos = set(np.ndindex(*self.n_chunks))
+
+    def set_region(self, inicio, fim, valor=1):
+        # Preenche a região [inicio, fim) com o valor dado
+        regiao = self._recortar(inicio, fim)
+        if regiao is None:
+            return
+        self.matriz[regiao] = valor
+        self._marcar_sujos(regiao)
+
+    def clear_region(self, inicio, fim):
+        self.set_region(inicio, fim, 0)
+
+    def stamp(self, forma, origem, operacao="uniao"):
+        """ Aplica uma operação CSG ('uniao', 'subtracao' ou 'intersecao') com a matriz forma posicionada em origem. """
+        if operacao not in ("uniao", "subtracao", "intersecao"):
+            raise ValueError("Operação inválida! Escolha entre 'uniao', 'subtracao' ou 'intersecao'.")
+
+        forma = np.asarray(forma, dtype=float)
+        origem = np.asarray(origem, dtype=int)
+        regiao = self._recortar(origem, origem + forma.shape)
+
+        if operacao == "intersecao":
+            # A interseção também zera tudo o que está fora da forma
+            self._zerar_fora(regiao)
+            if regiao is not None:
+                recorte = self._recorte_forma(forma, origem, regiao)
+                np.minimum(self.matriz[regiao], recorte, out=self.matriz[regiao])
+                self._marcar_sujos(regiao)
+            return
+
+        if regiao is None:
+            return
+        recorte = self._recorte_forma(forma, origem, regiao)
+
+        if operacao == "uniao":
+            np.maximum(self.matriz[regiao], recorte, out=self.matriz[regiao])
+        else:
+            self.matriz[regiao][recorte > self.nivel] = 0
+
+        self._marcar_sujos(regiao)
+
+    def _zerar_fora(self, regiao):
+        # Zera os voxels fora da região, sujando apenas os chunks que tinham conteúdo ali
+        for chunk in np.ndindex(*self.n_chunks):
+            bloco_regiao = tuple(
+                slice(c * self.tamanho_chunk, min((c + 1) * self.tamanho_chunk, n))
+                for c, n in zip(chunk, self.matriz.shape)
+            )
+            bloco = self.matriz[bloco_regiao]
+
+            ocupado = bloco != 0
+            if regiao is not None:
+                # Parte do chunk que fica dentro da região é preservada
+                dentro = tuple(
+                    slice(max(r.start - b.start, 0), max(min(r.stop, b.stop) - b.start, 0))
+                    for r, b in zip(regiao, bloco_regiao)
+                )
+                ocupado[dentro] = False
+
+            if ocupado.any():
+                bloco[ocupado] = 0
+                self._marcar_sujos(bloco_regiao)
+
+    def update_mesh(self):
+        """ Re-extrai a superfície apenas dos chunks sujos e retorna quantos foram processados. """
+        processados = len(self.sujos)
+        for chunk in self.sujos:
+            malha = self._extrair_chunk(chunk)
+            if malha is None:
+                self.malhas.pop(chunk, None)
+            else:
+                self.malhas[chunk] = malha
+        self.sujos.clear()
+        return processados
+
+    def mesh(self):
+        """ Retorna a malha completa (vértices, faces) juntando as malhas de todos os chunks. """
+        self.update_mesh()
+
+        if not self.malhas:
+            return np.zeros((0, 3)), np.zeros((0, 3), dtype=int)
+
+        vertices = []
+        faces = []
+        deslocamento = 0
+        for verts, fcs in self.malhas.values():
+            vertices.append(verts)
+            faces.append(fcs + deslocamento)
+            deslocamento += len(verts)
+
+        return np.concatenate(vertices), np.concatenate(faces)
+
+    def _recortar(self, inicio, fim):
+        # Limita a região [inicio, fim) às dimensões da matriz
+        inicio = np.maximum(np.asarray(inicio, dtype=int), 0)
+        fim = np.minimum(np.asarray(fim, dtype=int), self.matriz.shape)
+        if np.any(fim <= inicio):
+            return None
+        return tuple(slice(a, b) for a, b in zip(inicio, fim))
+
+    def _recorte_forma(self, forma, origem, regiao):
+        # Parte da forma que cai dentro da região recortada da matriz
+        return forma[tuple(slice(s.start - o, s.stop - o) for s, o in zip(regiao, origem))]
+
+    def _marcar_sujos(self, regiao):
+        # Um voxel alterado afeta as células que o usam como vértice, ou seja,
+        # as células de índice [inicio - 1, fim). Por isso a borda de um voxel
+        # pode sujar também o chunk vizinho.
+        faixas = []
+        for s, n in zip(regiao, self.n_chunks):
+            primeiro = max(s.start - 1, 0) // self.tamanho_chunk
+            ultimo = min((s.stop - 1) // self.tamanho_chunk, n - 1)
+            faixas.append(range(primeiro, ultimo + 1))
+
+        for i in faixas[0]:
+            for j in faixas[1]:
+                for k in faixas[2]:
+                    self.sujos.add((i, j, k))
+
+    def _extrair_chunk(self, chunk):
+        # O chunk cobre as células [inicio, fim); o bloco inclui um voxel a mais
+        # em cada eixo para que chunks vizinhos se encaixem sem buracos.
+        inicio = np.array(chunk) * self.tamanho_chunk
+        fim = np.minimum(inicio + self.tamanho_chunk + 1, self.matriz.shape)
+        if np.any(fim - inicio < 2):
+            return None
+
+        bloco = self.matriz[tuple(slice(a, b) for a, b in zip(inicio, fim))]
+
+        # O marching cubes exige que o nível esteja dentro do intervalo dos dados
+        if bloco.min() >= self.nivel or bloco.max() <= self.nivel:
+            return None
+
+        verts, faces, _, _ = marching_cubes(bloco, level=self.nivel, spacing=tuple(self.espacamento))
+        return verts + inicio * self.espacamento, faces
@@ -0,0 +1,122 @@
+import numpy as np
+
+
+def voxelize_mesh(vertices, faces, shape, origem=None, espacamento=None, eixo=0,
+                  lote_faces=65536, max_candidatos=4_000_000, dtype=float):
+    """ Converte uma malha fechada (vértices, faces) em uma matriz de ocupação 0/1 por paridade de raios. """
+    vertices = np.asarray(vertices)
+    faces = np.asarray(faces)
+    shape = tuple(int(n) for n in shape)
+
+    # Por padrão a malha é ajustada para ocupar a grade inteira
+    if origem is None:
+        origem = vertices.min(axis=0)
+    if espacamento is None:
+        extensao = vertices.max(axis=0) - np.asarray(origem)
+        espacamento = np.where(extensao > 0, extensao / np.maximum(np.array(shape) - 1, 1), 1)
+
+    # Reordena os eixos para que os raios andem sempre ao longo do primeiro eixo
+    ordem = [eixo] + [a for a in range(3) if a != eixo]
+    origem = np.asarray(origem, dtype=float)[ordem]
+    espacamento = np.asarray(espacamento, dtype=float)[ordem]
+    n0, n1, n2 = (shape[a] for a in ordem)
+
+    # Cada cruzamento alterna a paridade a partir do primeiro voxel depois dele.
+    # O uint8 pode estourar, mas a paridade (bit menos significativo) é preservada.
+    alternancias = np.zeros((n0 + 1) * n1 * n2, dtype=np.uint8)
+
+    # Todo o preparo por triângulo é feito em fatias de lote_faces, de modo que a memória
+    # de trabalho não cresce com o número total de faces
+    for inicio in range(0, len(faces), lote_faces):
+        _cruzar_lote(vertices, faces[inicio:inicio + lote_faces], ordem, origem, espacamento,
+                     (n0, n1, n2), max_candidatos, alternancias)
+
+    # A soma acumulada ao longo dos raios processa linhas inteiras de uma vez
+    alternancias = alternancias.reshape(n0 + 1, n1, n2)[:n0]
+    ocupacao = np.cumsum(alternancias, axis=0, dtype=np.uint8) & 1
+
+    # Volta à ordem original dos eixos, no mesmo formato usado pelos geradores de polygon/
+    ocupacao = np.transpose(ocupacao, np.argsort(ordem))
+    return ocupacao.astype(dtype)
+
+
+def _cruzar_lote(vertices, faces, ordem, origem, espacamento, shape, max_candidatos, alternancias):
+    # Registra em alternancias os cruzamentos dos raios com uma fatia de triângulos
+    n0, n1, n2 = shape
+
+    # Coordenadas no espaço de índices da grade: o centro do voxel i fica em i
+    tri = (vertices[faces][:, :, ordem] - origem) / espacamento  # (F, 3 vértices, 3 coordenadas)
+    a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+
+    # Área orientada no plano dos raios; triângulos degenerados não são cruzados
+    area = (b[:, 1] - a[:, 1]) * (c[:, 2] - a[:, 2]) - (b[:, 2] - a[:, 2]) * (c[:, 1] - a[:, 1])
+    validos = area != 0
+    a, b, c, area = a[validos], b[validos], c[validos], area[validos]
+
+    # Garante orientação anti-horária trocando b e c quando a área é negativa
+    inverter = area < 0
+    b, c = np.where(inverter[:, None], c, b), np.where(inverter[:, None], b, c)
+    area = np.abs(area)
+
+    # Raios candidatos de cada triângulo: centros dentro da caixa envolvente 2D
+    uv = np.stack([a[:, 1:], b[:, 1:], c[:, 1:]], axis=1)
+    j0 = np.clip(np.ceil(uv[:, :, 0].min(axis=1)), 0, n1).astype(np.int64)
+    j1 = np.clip(np.floor(uv[:, :, 0].max(axis=1)), -1, n1 - 1).astype(np.int64)
+    k0 = np.clip(np.ceil(uv[:, :, 1].min(axis=1)), 0, n2).astype(np.int64)
+    k1 = np.clip(np.floor(uv[:, :, 1].max(axis=1)), -1, n2 - 1).astype(np.int64)
+    larg_j = np.maximum(j1 - j0 + 1, 0)
+    larg_k = np.maximum(k1 - k0 + 1, 0)
+    contagens = larg_j * larg_k
+    acumulado = np.cumsum(contagens)
+
+    # Dentro da fatia, os triângulos ainda são agrupados pelo número de raios candidatos,
+    # para que triângulos grandes não estourem a memória da expansão
+    inicio = 0
+    total = len(contagens)
+    while inicio < total:
+        base = acumulado[inicio - 1] if inicio > 0 else 0
+        fim = max(int(np.searchsorted(acumulado, base + max_candidatos, side="right")), inicio + 1)
+        lote = slice(inicio, fim)
+        inicio = fim
+
+        n_cand = contagens[lote]
+        if n_cand.sum() == 0:
+            continue
+
+        # Expande cada triângulo em todos os seus raios candidatos de uma vez
+        ids = np.repeat(np.arange(len(n_cand)), n_cand)
+        local = np.arange(len(ids)) - np.repeat(np.cumsum(n_cand) - n_cand, n_cand)
+        lk = larg_k[lote][ids]
+        j = j0[lote][ids] + local // lk
+        k = k0[lote][ids] + local % lk
+
+        pa, pb, pc = a[lote][ids], b[lote][ids], c[lote][ids]
+
+        # Funções de aresta (coordenadas baricêntricas não normalizadas)
+        w0 = _aresta(pb, pc, j, k)
+        w1 = _aresta(pc, pa, j, k)
+        w2 = _aresta(pa, pb, j, k)
+        dentro = (_inclui(w0, pb, pc) & _inclui(w1, pc, pa) & _inclui(w2, pa, pb))
+
+        if not np.any(dentro):
+            continue
+
+        # Profundidade do cruzamento ao longo do raio
+        w0, w1, w2 = w0[dentro], w1[dentro], w2[dentro]
+        prof = (w0 * pa[dentro, 0] + w1 * pb[dentro, 0] + w2 * pc[dentro, 0]) / area[lote][ids[dentro]]
+        i = np.clip(np.ceil(prof), 0, n0).astype(np.int64)
+
+        np.add.at(alternancias, (i * n1 + j[dentro]) * n2 + k[dentro], 1)
+
+
+def _aresta(p, q, j, k):
+    # Valor da função de aresta p->q no centro do raio (j, k)
+    return (q[:, 1] - p[:, 1]) * (k - p[:, 2]) - (q[:, 2] - p[:, 2]) * (j - p[:, 1])
+
+
+def _inclui(w, p, q):
+    # Regra topo-esquerda: raios exatamente sobre uma aresta compartilhada
+    # são contados por apenas um dos dois triângulos
+    du = q[:, 1] - p[:, 1]
+    dv = q[:, 2] - p[:, 2]
+    return (w > 0) | ((w == 0) & ((dv < 0) | ((dv == 0) & (du > 0))))